@@ -0,0 +1,169 @@
+import threading
+import time
+from flask import request, jsonify, render_template
+from flask_login import current_user
+from werkzeug.wsgi import ClosingIterator
+
+ADMIN, AUTHENTICATED, ANONYMOUS = 0, 1, 2
+
+# Admins still queue past a full wait list, but only up to this multiple of it
+ADMIN_QUEUE_FACTOR = 2
+
+SLOT_KEY = 'qp.admission_slot'
+
+UPLOAD_ENDPOINTS = {'admin.upload_paper', 'papers_api.upload_paper'}
+EXEMPT_ENDPOINTS = {'static', 'main.service_worker', 'admission_api.get_admission_stats'}
+
+
+class AdmissionGate:
+    def __init__(self, name, max_concurrent, max_queue):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.cond = threading.Condition()
+        self.in_flight = 0
+        self.waiting = [0, 0, 0]
+        self.admitted = 0
+        self.shed = 0
+
+    def _can_enter(self, priority):
+        if self.in_flight >= self.max_concurrent:
+            return False
+        # A free slot goes to the most important waiter first
+        return not any(self.waiting[:priority])
+
+    def acquire(self, priority, timeout):
+        with self.cond:
+            if self._can_enter(priority):
+                self.in_flight += 1
+                self.admitted += 1
+                return True
+
+            max_queue = self.max_queue * ADMIN_QUEUE_FACTOR if priority == ADMIN else self.max_queue
+            if sum(self.waiting) >= max_queue:
+                self.shed += 1
+                return False
+
+            deadline = time.monotonic() + timeout
+            self.waiting[priority] += 1
+            try:
+                while not self._can_enter(priority):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.shed += 1
+                        return False
+                    self.cond.wait(remaining)
+                self.in_flight += 1
+                self.admitted += 1
+                return True
+            finally:
+                self.waiting[priority] -= 1
+                # Waking lower-priority waiters after a timeout lets them
+                # re-check whether they are now first in line.
+                self.cond.notify_all()
+
+    def release(self):
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+
+    def stats(self):
+        with self.cond:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'in_flight': self.in_flight,
+                'waiting': sum(self.waiting),
+                'admitted': self.admitted,
+                'shed': self.shed
+            }
+
+
+class AdmissionController:
+    def __init__(self, limits, queue_timeout, retry_after):
+        self.gates = {
+            name: AdmissionGate(name, limit['max_concurrent'], limit['max_queue'])
+            for name, limit in limits.items()
+        }
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+    def stats(self):
+        return {name: gate.stats() for name, gate in self.gates.items()}
+
+
+def route_class():
+    endpoint = request.endpoint
+    if endpoint is None or endpoint in EXEMPT_ENDPOINTS:
+        return None
+    if endpoint == 'main.download_paper':
+        return 'download'
+    if endpoint in UPLOAD_ENDPOINTS:
+        return 'upload'
+    if request.blueprint and request.blueprint.endswith('_api'):
+        return 'api'
+    return 'browse'
+
+
+def request_priority():
+    # Priority follows who is logged in, never the URL, so anonymous
+    # requests to /admin/ are shed like any other anonymous traffic
+    if not current_user.is_authenticated:
+        return ANONYMOUS
+    return ADMIN if current_user.is_admin else AUTHENTICATED
+
+
+def overloaded_response(controller):
+    if request.blueprint and request.blueprint.endswith('_api'):
+        response = jsonify({'success': False, 'error': 'Server is busy, please retry shortly'})
+    else:
+        response = render_template('errors/503.html')
+    return response, 503, {'Retry-After': str(controller.retry_after)}
+
+
+def init_admission(app):
+    controller = AdmissionController(
+        app.config['ADMISSION_LIMITS'],
+        app.config['ADMISSION_QUEUE_TIMEOUT'],
+        app.config['ADMISSION_RETRY_AFTER']
+    )
+    app.extensions['admission'] = controller
+
+    if not app.config.get('ADMISSION_ENABLED', True):
+        return
+
+    @app.before_request
+    def admit_request():
+        gate = controller.gates.get(route_class())
+        if gate is None:
+            return None
+        if not gate.acquire(request_priority(), controller.queue_timeout):
+            return overloaded_response(controller)
+        # Kept on the WSGI environ rather than g so that nested request
+        # contexts sharing this app context cannot release the slot.
+        request.environ[SLOT_KEY] = gate
+
+    @app.after_request
+    def release_on_close(response):
+        # The slot is held until the server has finished sending the body,
+        # so the download class caps concurrent transfers, not just handler
+        # time. Registered before the other after_request hooks, this one
+        # runs last and sees the final response object.
+        gate = request.environ.pop(SLOT_KEY, None)
+        if gate is None:
+            return response
+        if response.direct_passthrough:
+            # send_file bodies are handed to the server as they are, so
+            # call_on_close would never fire; close the body with the slot
+            response.response = ClosingIterator(response.response, gate.release)
+        else:
+            response.call_on_close(gate.release)
+        return response
+
+    @app.teardown_request
+    def release_request(exc):
+        # Only requests that raised before producing a response get here
+        # still holding their slot
+        gate = request.environ.pop(SLOT_KEY, None)
+        if gate is not None:
+            gate.release()
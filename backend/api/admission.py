@@ -0,0 +1,15 @@
+from flask import Blueprint, jsonify, current_app
+from flask_login import login_required, current_user
+
+admission_api = Blueprint('admission_api', __name__)
+
+@admission_api.route('/', methods=['GET'])
+@login_required
+def get_admission_stats():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'Admin privileges required'}), 403
+    
+    return jsonify({
+        'success': True,
+        'route_classes': current_app.extensions['admission'].stats()
+    })
\ No newline at end of file
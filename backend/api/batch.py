@@ -0,0 +1,74 @@
+from flask import Blueprint, jsonify, request, current_app
+from flask_login import current_user
+from werkzeug.exceptions import HTTPException
+from models import db
+
+batch_api = Blueprint('batch_api', __name__)
+
+ALLOWED_METHODS = {'GET', 'POST', 'PUT', 'DELETE'}
+
+def run_sub_request(sub):
+    method = str(sub.get('method', 'GET')).upper()
+    path = sub.get('path', '')
+    
+    if method not in ALLOWED_METHODS:
+        return 405, {'success': False, 'error': 'Method not allowed'}
+    if not path.startswith('/api/') or path.startswith('/api/batch'):
+        return 400, {'success': False, 'error': 'Only /api/ endpoints can be batched'}
+    
+    # The nested request context reuses the current app context, so every
+    # sub-request sees the same logged-in user and the same DB session.
+    # dispatch_request skips before_request hooks: sub-requests run one at a
+    # time inside the batch's own admission slot instead of taking their own.
+    with current_app.test_request_context(
+        path,
+        method=method,
+        json=sub.get('body'),
+        headers={'Cookie': request.headers.get('Cookie', '')}
+    ):
+        try:
+            response = current_app.make_response(current_app.dispatch_request())
+        except HTTPException as e:
+            return e.code, {'success': False, 'error': e.description}
+        except Exception:
+            current_app.logger.exception('Batched request to %s failed', path)
+            db.session.rollback()
+            return 500, {'success': False, 'error': 'Internal server error'}
+        
+        return response.status_code, response.get_json(silent=True)
+
+@batch_api.route('', methods=['POST'])
+def run_batch():
+    data = request.get_json(silent=True)
+    
+    if not isinstance(data, dict) or not isinstance(data.get('requests'), list):
+        return jsonify({'success': False, 'error': 'A list of requests is required'}), 400
+    
+    sub_requests = data['requests']
+    if len(sub_requests) > current_app.config['BATCH_MAX_REQUESTS']:
+        return jsonify({
+            'success': False,
+            'error': f"At most {current_app.config['BATCH_MAX_REQUESTS']} requests per batch"
+        }), 400
+    
+    # Flask-Login caches the loaded user on g, which lives on the app context
+    # the sub-requests share, so loading it here means they never hit the DB
+    # for it again
+    current_user._get_current_object()
+    
+    responses = []
+    for index, sub in enumerate(sub_requests):
+        if not isinstance(sub, dict):
+            status, body = 400, {'success': False, 'error': 'Each request must be an object'}
+        else:
+            status, body = run_sub_request(sub)
+        responses.append({
+            'id': sub.get('id', index) if isinstance(sub, dict) else index,
+            'status': status,
+            'body': body
+        })
+    
+    return jsonify({
+        'success': True,
+        'responses': responses
+    })
\ No newline at end of file
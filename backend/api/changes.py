@@ -0,0 +1,87 @@
+from flask import Blueprint, jsonify, request, current_app
+from models import ChangeLog, Course, QuestionPaper
+from changes import current_version, compaction_horizon, DELETE
+
+changes_api = Blueprint('changes_api', __name__)
+
+def serialize_course(course):
+    return {
+        'id': course.id,
+        'name': course.name,
+        'code': course.code,
+        'created_at': course.created_at.isoformat()
+    }
+
+def serialize_paper(paper):
+    return {
+        'id': paper.id,
+        'title': paper.title,
+        'course': {
+            'id': paper.course.id,
+            'name': paper.course.name,
+            'code': paper.course.code
+        },
+        'year': paper.year,
+        'semester': paper.semester,
+        'subject': paper.subject,
+        'filename': paper.filename,
+        'uploaded_by': paper.uploader.username,
+        'created_at': paper.created_at.isoformat()
+    }
+
+ENTITIES = {
+    'course': (Course, serialize_course),
+    'paper': (QuestionPaper, serialize_paper)
+}
+
+@changes_api.route('', methods=['GET'])
+def get_changes():
+    try:
+        since = int(request.args.get('since', 0))
+        limit = int(request.args.get('limit', current_app.config['CHANGE_FEED_PAGE_SIZE']))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid since or limit'}), 400
+    
+    limit = max(1, min(limit, current_app.config['CHANGE_FEED_PAGE_SIZE']))
+    latest = current_version()
+    
+    # A client behind the compaction horizon may have missed a delete; one
+    # ahead of the log is syncing against a different database.
+    if since < compaction_horizon() or since > latest:
+        return jsonify({
+            'success': True,
+            'reset': True,
+            'version': latest,
+            'has_more': False,
+            'changes': []
+        })
+    
+    entries = ChangeLog.query.filter(ChangeLog.version > since).order_by(ChangeLog.version).limit(limit + 1).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    
+    # Load the current state of every upserted row with one query per entity
+    rows = {}
+    for entity, (model, _) in ENTITIES.items():
+        ids = [e.entity_id for e in entries if e.entity == entity and e.op != DELETE]
+        if ids:
+            rows[entity] = {row.id: row for row in model.query.filter(model.id.in_(ids)).all()}
+    
+    changes = []
+    for entry in entries:
+        row = rows.get(entry.entity, {}).get(entry.entity_id)
+        changes.append({
+            'version': entry.version,
+            'entity': entry.entity,
+            'id': entry.entity_id,
+            'op': entry.op if row is not None else DELETE,
+            'data': ENTITIES[entry.entity][1](row) if row is not None else None
+        })
+    
+    return jsonify({
+        'success': True,
+        'reset': False,
+        'version': entries[-1].version if entries else latest,
+        'has_more': has_more,
+        'changes': changes
+    })
\ No newline at end of file
@@ -1,6 +1,9 @@
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
-from models import db, Course
+from models import db, Course, PaperStats, QuestionPaper
+from changes import record_change, record_changes, record_changes_from, UPSERT, DELETE
+from lookups import invalidate_courses
+from stats import course_has_papers
 
 courses_api = Blueprint('courses_api', __name__)
 
@@ -53,7 +56,10 @@ def create_course():
     )
     
     db.session.add(course)
+    db.session.flush()
+    record_change('course', course.id, UPSERT)
     db.session.commit()
+    invalidate_courses()
     
     return jsonify({
         'success': True,
@@ -85,7 +91,12 @@ def update_course(course_id):
             return jsonify({'success': False, 'error': 'Course code already exists'}), 400
         course.code = data['code']
     
+    record_change('course', course.id, UPSERT)
+    # Papers in the change feed embed the course name and code
+    if 'name' in data or 'code' in data:
+        record_changes_from('paper', db.session.query(QuestionPaper.id).filter_by(course_id=course.id), UPSERT)
     db.session.commit()
+    invalidate_courses()
     
     return jsonify({
         'success': True,
@@ -106,16 +117,45 @@ def delete_course(course_id):
     
     course = Course.query.get_or_404(course_id)
     
-    if course.question_papers:
+    if course_has_papers(course_id):
         return jsonify({
             'success': False, 
             'error': 'Cannot delete course with existing question papers'
         }), 400
     
     db.session.delete(course)
+    record_change('course', course_id, DELETE)
     db.session.commit()
+    invalidate_courses()
     
     return jsonify({
         'success': True,
         'message': 'Course deleted successfully'
+    })
+
+@courses_api.route('/bulk', methods=['DELETE'])
+@login_required
+def bulk_delete_courses():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'Admin privileges required'}), 403
+    
+    data = request.get_json()
+    
+    if not data or not isinstance(data.get('ids'), list) or not data['ids']:
+        return jsonify({'success': False, 'error': 'ids must be a non-empty list'}), 400
+    
+    has_papers = db.session.query(PaperStats.course_id).filter(PaperStats.course_id == Course.id).exists()
+    deletable = Course.query.filter(Course.id.in_(data['ids']), ~has_papers)
+    ids = [row.id for row in deletable.with_entities(Course.id)]
+    
+    Course.query.filter(Course.id.in_(ids)).delete(synchronize_session=False)
+    record_changes('course', ids, DELETE)
+    db.session.commit()
+    invalidate_courses()
+    
+    return jsonify({
+        'success': True,
+        'message': f'{len(ids)} courses deleted',
+        'deleted': ids,
+        'skipped': [course_id for course_id in data['ids'] if course_id not in ids]
     })
\ No newline at end of file
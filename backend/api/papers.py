@@ -1,8 +1,12 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, current_app, jsonify, request
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
-import os
-from models import db, QuestionPaper, Course
+from models import db, QuestionPaper, Course, FileFingerprint, PackedPaper, PaperAccess
+from storage import get_storage, paper_key, fingerprint, delete_later
+from changes import record_change, record_changes_from, UPSERT, DELETE
+from stats import paper_added, paper_removed, refresh_groups, refresh_uploaders
+from suggest import get_suggest_index
+from tiering import forget_papers
 
 papers_api = Blueprint('papers_api', __name__)
 
@@ -110,11 +114,8 @@ def upload_paper():
         return jsonify({'success': False, 'error': 'Course not found'}), 404
     
     filename = secure_filename(file.filename)
-    upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{year}_{semester}_{course_id}")
-    os.makedirs(upload_path, exist_ok=True)
-    
-    file_path = os.path.join(upload_path, filename)
-    file.save(file_path)
+    size, sha256 = fingerprint(file.stream)
+    file_path = get_storage().save(file.stream, paper_key(year, semester, course_id, filename))
     
     paper = QuestionPaper(
         title=title,
@@ -126,8 +127,12 @@ def upload_paper():
         file_path=file_path,
         uploaded_by=current_user.id
     )
+    paper.fingerprint = FileFingerprint(size=size, sha256=sha256)
     
     db.session.add(paper)
+    db.session.flush()
+    record_change('paper', paper.id, UPSERT)
+    paper_added(paper)
     db.session.commit()
     
     return jsonify({
@@ -161,6 +166,8 @@ def update_paper(paper_id):
     if not data:
         return jsonify({'success': False, 'error': 'No data provided'}), 400
     
+    old_group = (paper.course_id, paper.year, paper.semester)
+    
     if 'title' in data:
         paper.title = data['title']
     if 'subject' in data:
@@ -175,6 +182,10 @@ def update_paper(paper_id):
             return jsonify({'success': False, 'error': 'Course not found'}), 404
         paper.course_id = data['course_id']
     
+    record_change('paper', paper.id, UPSERT)
+    new_group = (paper.course_id, paper.year, paper.semester)
+    if new_group != old_group:
+        refresh_groups([old_group, new_group])
     db.session.commit()
     
     return jsonify({
@@ -204,19 +215,152 @@ def delete_paper(paper_id):
     
     paper = QuestionPaper.query.get_or_404(paper_id)
     
-    try:
-        os.remove(paper.file_path)
-    except:
-        pass
+    get_storage().delete(paper.file_path)
     
     db.session.delete(paper)
+    record_change('paper', paper_id, DELETE)
+    paper_removed(paper)
     db.session.commit()
+    forget_papers([paper_id])
     
     return jsonify({
         'success': True,
         'message': 'Question paper deleted successfully'
     })
 
+BULK_FILTER_FIELDS = {'course_id', 'year', 'semester', 'subject'}
+
+def bulk_selection(data):
+    if 'ids' in data:
+        ids = data['ids']
+        if not isinstance(ids, list) or not ids:
+            return None, 'ids must be a non-empty list'
+        return QuestionPaper.query.filter(QuestionPaper.id.in_(ids)), None
+    
+    filters = data.get('filter')
+    if not isinstance(filters, dict) or not filters:
+        return None, 'Either ids or a non-empty filter is required'
+    
+    unknown = set(filters) - BULK_FILTER_FIELDS
+    if unknown:
+        return None, f"Unsupported filter fields: {', '.join(sorted(unknown))}"
+    
+    return QuestionPaper.query.filter_by(**filters), None
+
+def selection_groups(query):
+    return query.with_entities(
+        QuestionPaper.course_id, QuestionPaper.year, QuestionPaper.semester
+    ).distinct().all()
+
+@papers_api.route('/bulk', methods=['PUT'])
+@login_required
+def bulk_update_papers():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'Admin privileges required'}), 403
+    
+    data = request.get_json(silent=True)
+    
+    if not isinstance(data, dict) or not data.get('changes'):
+        return jsonify({'success': False, 'error': 'No changes provided'}), 400
+    if not isinstance(data['changes'], dict):
+        return jsonify({'success': False, 'error': 'changes must be an object'}), 400
+    
+    query, error = bulk_selection(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    
+    changes = data['changes']
+    values = {}
+    
+    if 'title' in changes:
+        values['title'] = changes['title']
+    if 'subject' in changes:
+        values['subject'] = changes['subject']
+    try:
+        if 'year' in changes:
+            values['year'] = int(changes['year'])
+        if 'semester' in changes:
+            values['semester'] = int(changes['semester'])
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'Invalid year or semester'}), 400
+    if 'course_id' in changes:
+        if not Course.query.get(changes['course_id']):
+            return jsonify({'success': False, 'error': 'Course not found'}), 404
+        values['course_id'] = changes['course_id']
+    
+    if not values:
+        return jsonify({'success': False, 'error': 'No supported fields in changes'}), 400
+    
+    # Everything that depends on the selection is read or logged before the
+    # UPDATE, which may move rows out of the filter
+    ids = [row.id for row in query.with_entities(QuestionPaper.id).order_by(QuestionPaper.id)]
+    groups = set()
+    for course_id, year, semester in selection_groups(query):
+        groups.add((course_id, year, semester))
+        groups.add((
+            values.get('course_id', course_id),
+            values.get('year', year),
+            values.get('semester', semester)
+        ))
+    record_changes_from('paper', query.with_entities(QuestionPaper.id), UPSERT)
+    
+    # One UPDATE driven by the selection itself, committed together with its
+    # change log entries and the recounted stats of every group it touched
+    query.update(values, synchronize_session=False)
+    refresh_groups(groups)
+    db.session.commit()
+    
+    return jsonify({
+        'success': True,
+        'message': f'{len(ids)} question papers updated',
+        'updated': len(ids),
+        'ids': ids
+    })
+
+@papers_api.route('/bulk', methods=['DELETE'])
+@login_required
+def bulk_delete_papers():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'Admin privileges required'}), 403
+    
+    data = request.get_json(silent=True)
+    
+    if not isinstance(data, dict) or not data:
+        return jsonify({'success': False, 'error': 'No data provided'}), 400
+    
+    query, error = bulk_selection(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    
+    rows = query.with_entities(QuestionPaper.id, QuestionPaper.file_path).order_by(QuestionPaper.id).all()
+    ids = [row.id for row in rows]
+    groups = selection_groups(query)
+    uploaders = [row.uploaded_by for row in query.with_entities(QuestionPaper.uploaded_by).distinct()]
+    
+    # The selection is applied as a subquery rather than a list of ids, so
+    # the statements stay the same size however many papers match. Child
+    # rows go first: databases that enforce foreign keys reject the paper
+    # delete while anything still points at it.
+    id_select = query.with_entities(QuestionPaper.id)
+    record_changes_from('paper', id_select, DELETE)
+    for model in (FileFingerprint, PackedPaper, PaperAccess):
+        model.query.filter(model.paper_id.in_(id_select.subquery().select())).delete(synchronize_session=False)
+    query.delete(synchronize_session=False)
+    refresh_groups(groups)
+    refresh_uploaders(uploaders)
+    db.session.commit()
+    forget_papers(ids)
+    
+    # Files are removed in the background once the rows are gone for good
+    delete_later([row.file_path for row in rows])
+    
+    return jsonify({
+        'success': True,
+        'message': f'{len(ids)} question papers deleted',
+        'deleted': len(ids),
+        'ids': ids
+    })
+
 @papers_api.route('/years', methods=['GET'])
 def get_years():
     years = db.session.query(QuestionPaper.year).distinct().order_by(QuestionPaper.year.desc()).all()
@@ -246,4 +390,27 @@ def get_subjects():
     return jsonify({
         'success': True,
         'subjects': [subject[0] for subject in subjects]
+    })
+
+@papers_api.route('/suggest', methods=['GET'])
+def suggest():
+    q = request.args.get('q', '')
+    
+    try:
+        limit = min(int(request.args.get('limit', 10)), current_app.config['SUGGEST_MAX_RESULTS'])
+        scope = {
+            field: int(request.args[field])
+            for field in ('course_id', 'year', 'semester')
+            if request.args.get(field)
+        }
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid limit, course_id, year, or semester'}), 400
+    
+    # Served from the in-memory prefix index, never from a LIKE query, so it
+    # stays cheap enough to call on every keystroke
+    suggestions = get_suggest_index().search(q, limit=max(limit, 0), **scope)
+    
+    return jsonify({
+        'success': True,
+        'suggestions': suggestions
     })
\ No newline at end of file
@@ -0,0 +1,51 @@
+from flask import Blueprint, jsonify, request
+from models import PaperStats
+
+stats_api = Blueprint('stats_api', __name__)
+
+@stats_api.route('', methods=['GET'])
+def get_stats():
+    course_id = request.args.get('course_id')
+    year = request.args.get('year')
+    semester = request.args.get('semester')
+    
+    query = PaperStats.query
+    
+    if course_id:
+        query = query.filter_by(course_id=course_id)
+    if year:
+        query = query.filter_by(year=year)
+    if semester:
+        query = query.filter_by(semester=semester)
+    
+    groups = query.order_by(PaperStats.course_id, PaperStats.year.desc(), PaperStats.semester).all()
+    
+    courses = {}
+    for group in groups:
+        course = courses.setdefault(group.course_id, {
+            'course_id': group.course_id,
+            'paper_count': 0,
+            'latest_upload': None
+        })
+        course['paper_count'] += group.paper_count
+        if group.latest_upload and (course['latest_upload'] is None or group.latest_upload > course['latest_upload']):
+            course['latest_upload'] = group.latest_upload
+    
+    return jsonify({
+        'success': True,
+        'total_papers': sum(group.paper_count for group in groups),
+        'courses': [
+            dict(course, latest_upload=course['latest_upload'].isoformat() if course['latest_upload'] else None)
+            for course in courses.values()
+        ],
+        'groups': [
+            {
+                'course_id': group.course_id,
+                'year': group.year,
+                'semester': group.semester,
+                'paper_count': group.paper_count,
+                'latest_upload': group.latest_upload.isoformat() if group.latest_upload else None
+            }
+            for group in groups
+        ]
+    })
\ No newline at end of file
@@ -2,6 +2,7 @@ from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 from werkzeug.security import generate_password_hash
 from models import db, User
+from stats import user_has_papers
 
 users_api = Blueprint('users_api', __name__)
 
@@ -154,7 +155,7 @@ def delete_user(user_id):
     
     user = User.query.get_or_404(user_id)
     
-    if user.uploaded_papers:
+    if user_has_papers(user_id):
         return jsonify({
             'success': False, 
             'error': 'Cannot delete user with uploaded papers'
@@ -1,7 +1,13 @@
-from flask import Flask, render_template
+from flask import Flask, render_template, request
 from flask_login import LoginManager
 from config import Config
 from models import db, User
+from storage import init_storage
+from admission import init_admission
+from commands import register_commands
+from stats import ensure_stats
+from tiering import init_tiering
+from suggest import init_suggest
 from pathlib import Path
 
 def create_app():
@@ -15,6 +21,10 @@ def create_app():
     app.config.from_object(Config)
 
     db.init_app(app)
+    init_storage(app)
+    init_admission(app)
+    init_tiering(app)
+    init_suggest(app)
     
     login_manager = LoginManager()
     login_manager.init_app(app)
@@ -26,6 +36,15 @@ def create_app():
     def load_user(user_id):
         return User.query.get(int(user_id))
 
+    @app.after_request
+    def add_etag(response):
+        # Lets browsers and the service worker revalidate API reads with
+        # If-None-Match and get an empty 304 when nothing changed
+        if request.method == 'GET' and response.status_code == 200 and response.mimetype == 'application/json':
+            response.add_etag()
+            response.make_conditional(request)
+        return response
+
     # Error handlers
     @app.errorhandler(404)
     def not_found_error(error):
@@ -46,6 +65,10 @@ def create_app():
     from api.courses import courses_api
     from api.papers import papers_api
     from api.users import users_api
+    from api.admission import admission_api
+    from api.batch import batch_api
+    from api.changes import changes_api
+    from api.stats import stats_api
 
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(main_bp)
@@ -53,6 +76,12 @@ def create_app():
     app.register_blueprint(courses_api, url_prefix='/api/courses')
     app.register_blueprint(papers_api, url_prefix='/api/papers')
     app.register_blueprint(users_api, url_prefix='/api/users')
+    app.register_blueprint(admission_api, url_prefix='/api/admission')
+    app.register_blueprint(batch_api, url_prefix='/api/batch')
+    app.register_blueprint(changes_api, url_prefix='/api/changes')
+    app.register_blueprint(stats_api, url_prefix='/api/stats')
+
+    register_commands(app)
 
     return app
 
@@ -91,5 +120,6 @@ if __name__ == '__main__':
         db.create_all()
         create_admin_user()
         create_default_courses()
+        ensure_stats()
     
     app.run(debug=True)
\ No newline at end of file
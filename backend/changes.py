@@ -0,0 +1,77 @@
+from datetime import datetime
+from models import db, ChangeLog, ChangeLogCompaction
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+
+def record_changes(entity, entity_ids, op):
+    entity_ids = list(entity_ids)
+    if not entity_ids:
+        return
+
+    # Only the newest entry per entity is ever needed to sync, so older ones
+    # are dropped as part of the same write.
+    ChangeLog.query.filter(
+        ChangeLog.entity == entity,
+        ChangeLog.entity_id.in_(entity_ids)
+    ).delete(synchronize_session=False)
+
+    db.session.add_all([
+        ChangeLog(entity=entity, entity_id=entity_id, op=op)
+        for entity_id in entity_ids
+    ])
+
+
+def record_change(entity, entity_id, op):
+    record_changes(entity, [entity_id], op)
+
+
+def record_changes_from(entity, id_select, op):
+    # Set-based form of record_changes for selections too large to send as
+    # bound ids: the ids never leave the database (INSERT ... SELECT).
+    ids = id_select.subquery()
+    id_column = list(ids.c)[0]
+
+    ChangeLog.query.filter(
+        ChangeLog.entity == entity,
+        ChangeLog.entity_id.in_(db.select(id_column))
+    ).delete(synchronize_session=False)
+
+    db.session.execute(db.insert(ChangeLog).from_select(
+        ['entity', 'entity_id', 'op'],
+        db.select(db.literal(entity), id_column, db.literal(op)).order_by(id_column)
+    ))
+
+
+def latest_version():
+    return db.session.query(db.func.max(ChangeLog.version)).scalar() or 0
+
+
+def compaction_horizon():
+    return db.session.query(db.func.max(ChangeLogCompaction.purged_through)).scalar() or 0
+
+
+def current_version():
+    # Compaction can purge the newest entries too, leaving the log's maximum
+    # below the horizon; the catalog is still at the horizon's version then.
+    return max(latest_version(), compaction_horizon())
+
+
+def compact_changes(tombstone_ttl):
+    cutoff = datetime.utcnow() - tombstone_ttl
+    tombstones = ChangeLog.query.filter(
+        ChangeLog.op == DELETE,
+        ChangeLog.created_at < cutoff
+    )
+
+    purged_through = tombstones.with_entities(db.func.max(ChangeLog.version)).scalar()
+    if purged_through is None:
+        return 0
+
+    # Clients that synced before purged_through may have missed a delete and
+    # must start over with a full pull.
+    purged = tombstones.filter(ChangeLog.version <= purged_through).delete(synchronize_session=False)
+    db.session.add(ChangeLogCompaction(purged_through=purged_through))
+    db.session.commit()
+    return purged
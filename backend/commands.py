@@ -0,0 +1,71 @@
+from datetime import timedelta
+import click
+from changes import compact_changes
+from stats import rebuild_stats
+from scrubber import Scrubber, Checkpoint
+from storage import get_storage
+from tiering import demote, remove_dead_packs
+
+
+def register_commands(app):
+    @app.cli.command('compact-changes')
+    @click.option('--days', default=None, type=int, help='Purge tombstones older than this many days.')
+    def compact_changes_command(days):
+        """Purge old delete tombstones from the catalog change feed."""
+        if days is None:
+            days = app.config['CHANGE_FEED_TOMBSTONE_DAYS']
+        purged = compact_changes(timedelta(days=days))
+        click.echo(f"Purged {purged} tombstones older than {days} days")
+
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats_command():
+        """Recount the per-course and per-uploader paper statistics."""
+        rebuild_stats()
+        click.echo('Paper statistics rebuilt')
+
+    @app.cli.command('scrub')
+    @click.option('--workers', default=4, show_default=True, help='Threads verifying files.')
+    @click.option('--rate-mb', default=None, type=float, help='Read limit in MB/s across all threads (0 = unlimited).')
+    @click.option('--no-checksum', is_flag=True, help='Only compare sizes for already fingerprinted files.')
+    @click.option('--repair', is_flag=True, help='Delete rows whose file is missing and files with no row.')
+    @click.option('--limit', default=None, type=int, help='Stop after this many rows and files; rerun to continue.')
+    @click.option('--restart', is_flag=True, help='Ignore the saved checkpoint and start over.')
+    def scrub_command(workers, rate_mb, no_checksum, repair, limit, restart):
+        """Check stored paper files against the database."""
+        if rate_mb is None:
+            rate_mb = app.config['SCRUB_RATE_MB']
+        checkpoint = Checkpoint(app.config['SCRUB_CHECKPOINT'])
+        if restart:
+            checkpoint.reset()
+
+        scrubber = Scrubber(
+            app,
+            get_storage(),
+            checkpoint,
+            workers=workers,
+            bytes_per_second=int(rate_mb * 1024 * 1024),
+            verify_checksums=not no_checksum,
+            repair=repair,
+            orphan_grace=app.config['SCRUB_ORPHAN_GRACE']
+        )
+        report = scrubber.run(limit=limit)
+
+        click.echo(f"Rows checked: {report['rows_checked']}, files checked: {report['files_checked']}")
+        click.echo(f"Newly fingerprinted: {report['fingerprinted']}")
+        for problem in ('missing', 'size_mismatch', 'checksum_mismatch', 'unreadable'):
+            for entry in report[problem]:
+                click.echo(f"{problem}: paper {entry['paper_id']} ({entry['file_path']})")
+        for key in report['orphans']:
+            click.echo(f"orphan: {key}")
+        if repair:
+            click.echo(f"Removed {report['repaired_rows']} dangling rows and {report['repaired_orphans']} orphan files")
+        if not checkpoint.finished:
+            click.echo(f"Scrub incomplete; progress saved to {checkpoint.path}")
+
+    @app.cli.command('tier')
+    @click.option('--limit', default=None, type=int, help='Pack at most this many papers.')
+    def tier_command(limit):
+        """Move old, rarely downloaded papers into compressed pack files."""
+        demoted = demote(limit)
+        removed = remove_dead_packs()
+        click.echo(f"Packed {demoted} papers, removed {removed} packs with no live papers")
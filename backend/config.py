@@ -10,4 +10,60 @@ class Config:
     UPLOAD_FOLDER = BASE_DIR / 'frontend' / 'static' / 'uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
-    ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx'}
\ No newline at end of file
+    ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx'}
+
+    # File storage: 'local' writes under UPLOAD_FOLDER, 's3' targets any
+    # S3-compatible store (AWS, MinIO, or a local moto server for testing)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+    S3_BUCKET = os.environ.get('S3_BUCKET')
+    S3_PREFIX = os.environ.get('S3_PREFIX', '')
+    # Empty values (e.g. S3_ENDPOINT_URL= in .env) mean "not set": boto3
+    # rejects an empty endpoint and would not fall back to its own defaults
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL') or None
+    S3_REGION = os.environ.get('S3_REGION') or None
+    S3_ACCESS_KEY_ID = os.environ.get('S3_ACCESS_KEY_ID') or None
+    S3_SECRET_ACCESS_KEY = os.environ.get('S3_SECRET_ACCESS_KEY') or None
+    S3_URL_EXPIRY = int(os.environ.get('S3_URL_EXPIRY', 300))  # seconds
+    S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+    S3_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+
+    # Admission control: per route class concurrency limits with bounded wait
+    # queues. Requests that cannot be admitted within ADMISSION_QUEUE_TIMEOUT
+    # seconds get a 503 with Retry-After. Limits are per worker process.
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'true').lower() == 'true'
+    ADMISSION_LIMITS = {
+        'browse': {'max_concurrent': 32, 'max_queue': 64},
+        'download': {'max_concurrent': 16, 'max_queue': 32},
+        'upload': {'max_concurrent': 4, 'max_queue': 8},
+        'api': {'max_concurrent': 32, 'max_queue': 64}
+    }
+    ADMISSION_QUEUE_TIMEOUT = 2.0
+    ADMISSION_RETRY_AFTER = 5
+
+    BATCH_MAX_REQUESTS = 20
+
+    # Catalog change feed (/api/changes)
+    CHANGE_FEED_PAGE_SIZE = 500
+    CHANGE_FEED_TOMBSTONE_DAYS = 90
+
+    COURSE_CACHE_TTL = 60  # seconds
+
+    # Storage integrity scrubber (flask scrub)
+    SCRUB_CHECKPOINT = BASE_DIR / 'instance' / 'scrub_checkpoint.json'
+    SCRUB_RATE_MB = 10  # MB/s across all threads, 0 = unlimited
+    SCRUB_ORPHAN_GRACE = 3600  # seconds before an unreferenced file counts as orphaned
+
+    # Cold storage tiering (flask tier). Papers older than TIER_HOT_YEARS are
+    # packed unless downloaded in the last TIER_COOLDOWN_DAYS; a packed paper
+    # downloaded TIER_PROMOTE_HITS times within TIER_ACCESS_WINDOW seconds is
+    # moved back to the hot tier.
+    TIER_HOT_YEARS = 3
+    TIER_PACK_MAX_BYTES = 64 * 1024 * 1024
+    TIER_CACHE_BYTES = 32 * 1024 * 1024
+    TIER_PROMOTE_HITS = 20
+    TIER_ACCESS_WINDOW = 7 * 24 * 3600
+    TIER_COOLDOWN_DAYS = 30
+
+    # Typeahead index (/api/papers/suggest); how often it checks the change log
+    SUGGEST_REFRESH_INTERVAL = 1  # seconds
+    SUGGEST_MAX_RESULTS = 50
\ No newline at end of file
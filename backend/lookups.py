@@ -0,0 +1,29 @@
+import threading
+import time
+from flask import current_app
+from models import Course
+
+_lock = threading.Lock()
+_courses = {'expires_at': 0, 'choices': None}
+
+
+def course_choices():
+    with _lock:
+        if _courses['choices'] is not None and time.monotonic() < _courses['expires_at']:
+            return _courses['choices']
+
+    choices = [
+        {'id': course.id, 'name': course.name, 'code': course.code}
+        for course in Course.query.order_by(Course.name).all()
+    ]
+
+    # Other app nodes only see course edits once the TTL runs out
+    with _lock:
+        _courses['choices'] = choices
+        _courses['expires_at'] = time.monotonic() + current_app.config['COURSE_CACHE_TTL']
+    return choices
+
+
+def invalidate_courses():
+    with _lock:
+        _courses['choices'] = None
@@ -28,7 +28,62 @@ class QuestionPaper(db.Model):
     subject = db.Column(db.String(100), nullable=False)
     filename = db.Column(db.String(255), nullable=False)
     file_path = db.Column(db.String(500), nullable=False)
-    uploaded_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    uploaded_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    uploader = db.relationship('User', backref='uploaded_papers')
\ No newline at end of file
+    uploader = db.relationship('User', backref='uploaded_papers')
+
+class ChangeLog(db.Model):
+    # AUTOINCREMENT keeps SQLite from reusing the version of a compacted row
+    __table_args__ = (
+        db.Index('ix_change_log_entity', 'entity', 'entity_id'),
+        {'sqlite_autoincrement': True}
+    )
+
+    version = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ChangeLogCompaction(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    purged_through = db.Column(db.Integer, nullable=False)
+    compacted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class PaperStats(db.Model):
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    semester = db.Column(db.Integer, primary_key=True)
+    paper_count = db.Column(db.Integer, nullable=False, default=0)
+    latest_upload = db.Column(db.DateTime)
+
+class UploaderStats(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    paper_count = db.Column(db.Integer, nullable=False, default=0)
+
+class FileFingerprint(db.Model):
+    paper_id = db.Column(db.Integer, db.ForeignKey('question_paper.id'), primary_key=True)
+    size = db.Column(db.Integer, nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False)
+    verified_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    paper = db.relationship('QuestionPaper', backref=db.backref('fingerprint', uselist=False, cascade='all, delete-orphan'))
+
+class PackedPaper(db.Model):
+    paper_id = db.Column(db.Integer, db.ForeignKey('question_paper.id'), primary_key=True)
+    pack_key = db.Column(db.String(500), nullable=False, index=True)
+    offset = db.Column(db.Integer, nullable=False)
+    length = db.Column(db.Integer, nullable=False)
+    raw_size = db.Column(db.Integer, nullable=False)
+    packed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    paper = db.relationship('QuestionPaper', backref=db.backref('packed', uselist=False, cascade='all, delete-orphan'))
+
+class PaperAccess(db.Model):
+    paper_id = db.Column(db.Integer, db.ForeignKey('question_paper.id'), primary_key=True)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    window_start = db.Column(db.DateTime, nullable=False)
+    last_access = db.Column(db.DateTime, nullable=False)
+
+    paper = db.relationship('QuestionPaper', backref=db.backref('access', uselist=False, cascade='all, delete-orphan'))
\ No newline at end of file
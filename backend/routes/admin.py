@@ -1,8 +1,12 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
-import os
-from models import db, Course, QuestionPaper
+from models import db, Course, QuestionPaper, FileFingerprint
+from storage import get_storage, paper_key, fingerprint
+from changes import record_change, UPSERT, DELETE
+from lookups import course_choices, invalidate_courses
+from stats import paper_added, paper_removed
+from tiering import forget_papers
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -18,9 +22,81 @@ def admin_panel():
         flash('Access denied. Admin privileges required.')
         return redirect(url_for('main.home'))
     
-    courses = Course.query.all()
-    papers = QuestionPaper.query.order_by(QuestionPaper.created_at.desc()).all()
-    return render_template('admin.html', courses=courses, papers=papers)
+    # Papers are fetched page by page from admin.papers_data by admin.js
+    return render_template('admin.html', courses=course_choices())
+
+SORT_COLUMNS = {
+    'title': QuestionPaper.title,
+    'course': Course.code,
+    'year': QuestionPaper.year,
+    'semester': QuestionPaper.semester,
+    'subject': QuestionPaper.subject,
+    'created_at': QuestionPaper.created_at
+}
+
+@admin_bp.route('/papers')
+@login_required
+def papers_data():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'Admin privileges required'}), 403
+    
+    page = request.args.get('page', 1, type=int)
+    per_page = max(1, min(request.args.get('per_page', 50, type=int), 200))
+    sort = request.args.get('sort', 'created_at')
+    order = request.args.get('order', 'desc')
+    course_id = request.args.get('course_id', type=int)
+    year = request.args.get('year', type=int)
+    semester = request.args.get('semester', type=int)
+    search = request.args.get('q', '').strip()
+    
+    if sort not in SORT_COLUMNS:
+        return jsonify({'success': False, 'error': 'Invalid sort column'}), 400
+    
+    query = db.session.query(
+        QuestionPaper.id,
+        QuestionPaper.title,
+        QuestionPaper.year,
+        QuestionPaper.semester,
+        QuestionPaper.subject,
+        QuestionPaper.created_at,
+        Course.code.label('course_code')
+    ).join(Course, QuestionPaper.course_id == Course.id)
+    
+    if course_id:
+        query = query.filter(QuestionPaper.course_id == course_id)
+    if year:
+        query = query.filter(QuestionPaper.year == year)
+    if semester:
+        query = query.filter(QuestionPaper.semester == semester)
+    if search:
+        pattern = f"%{search}%"
+        query = query.filter(db.or_(QuestionPaper.title.ilike(pattern), QuestionPaper.subject.ilike(pattern)))
+    
+    column = SORT_COLUMNS[sort]
+    query = query.order_by(column.asc() if order == 'asc' else column.desc(), QuestionPaper.id.desc())
+    
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    
+    return jsonify({
+        'success': True,
+        'page': pagination.page,
+        'per_page': pagination.per_page,
+        'total': pagination.total,
+        'papers': [
+            {
+                'id': paper.id,
+                'title': paper.title,
+                'course_code': paper.course_code,
+                'year': paper.year,
+                'semester': paper.semester,
+                'subject': paper.subject,
+                'created_at': paper.created_at.strftime('%Y-%m-%d'),
+                'download_url': url_for('main.download_paper', paper_id=paper.id),
+                'delete_url': url_for('admin.delete_paper', paper_id=paper.id)
+            }
+            for paper in pagination.items
+        ]
+    })
 
 @admin_bp.route('/add-course', methods=['POST'])
 @login_required
@@ -38,7 +114,10 @@ def add_course():
     
     course = Course(name=name, code=code)
     db.session.add(course)
+    db.session.flush()
+    record_change('course', course.id, UPSERT)
     db.session.commit()
+    invalidate_courses()
     flash('Course added successfully')
     return redirect(url_for('admin.admin_panel'))
 
@@ -61,17 +140,14 @@ def upload_paper():
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
         
-        course_id = request.form['course_id']
+        course_id = int(request.form['course_id'])
         year = int(request.form['year'])
         semester = int(request.form['semester'])
         subject = request.form['subject']
         title = request.form['title']
         
-        upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{year}_{semester}_{course_id}")
-        os.makedirs(upload_path, exist_ok=True)
-        
-        file_path = os.path.join(upload_path, filename)
-        file.save(file_path)
+        size, sha256 = fingerprint(file.stream)
+        file_path = get_storage().save(file.stream, paper_key(year, semester, course_id, filename))
         
         paper = QuestionPaper(
             title=title,
@@ -83,8 +159,12 @@ def upload_paper():
             file_path=file_path,
             uploaded_by=current_user.id
         )
+        paper.fingerprint = FileFingerprint(size=size, sha256=sha256)
         
         db.session.add(paper)
+        db.session.flush()
+        record_change('paper', paper.id, UPSERT)
+        paper_added(paper)
         db.session.commit()
         flash('Question paper uploaded successfully')
     else:
@@ -101,12 +181,12 @@ def delete_paper(paper_id):
     
     paper = QuestionPaper.query.get_or_404(paper_id)
     
-    try:
-        os.remove(paper.file_path)
-    except:
-        pass
+    get_storage().delete(paper.file_path)
     
     db.session.delete(paper)
+    record_change('paper', paper_id, DELETE)
+    paper_removed(paper)
     db.session.commit()
+    forget_papers([paper_id])
     flash('Question paper deleted successfully')
     return redirect(url_for('admin.admin_panel'))
\ No newline at end of file
@@ -1,14 +1,22 @@
-from flask import Blueprint, render_template, send_from_directory, flash, redirect, url_for
+from flask import Blueprint, render_template, send_file, send_from_directory, flash, abort, redirect, url_for, current_app, request
 from flask_login import login_required, current_user
-import os
-from models import Course, QuestionPaper
+import io
+from models import db, Course, QuestionPaper
+from storage import get_storage
+from stats import course_paper_counts
+from tiering import read_packed, record_access, should_promote, promote
 
 main_bp = Blueprint('main', __name__)
 
 @main_bp.route('/')
 def home():
     courses = Course.query.all()
-    return render_template('home.html', courses=courses)
+    return render_template('home.html', courses=courses, paper_counts=course_paper_counts())
+
+@main_bp.route('/sw.js')
+def service_worker():
+    # Served from the site root so the worker's scope covers every page
+    return send_from_directory(current_app.static_folder, 'js/sw.js', max_age=0)
 
 @main_bp.route('/courses/<course_code>')
 @login_required
@@ -60,9 +68,37 @@ def download_paper(paper_id):
         return redirect(url_for('auth.login'))
     
     paper = QuestionPaper.query.get_or_404(paper_id)
-    return send_from_directory(
-        directory=os.path.dirname(paper.file_path),
-        path=os.path.basename(paper.file_path),
-        as_attachment=True,
-        download_name=paper.filename
-    )
\ No newline at end of file
+    storage = get_storage()
+    
+    # Only downloads that send the file count as hits; the service worker's
+    # conditional revalidations of cached papers (304s) must not drive
+    # promotion. Cold papers are served straight out of their pack file.
+    if paper.packed is not None:
+        packed = paper.packed
+        etag = paper.fingerprint.sha256 if paper.fingerprint else f"packed-{paper.id}-{packed.raw_size}"
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+        
+        data = read_packed(packed)
+        if should_promote(record_access(paper)):
+            promote(paper, data)
+        db.session.commit()
+        return send_file(io.BytesIO(data), as_attachment=True, download_name=paper.filename, etag=etag)
+
+    # Object stores hand out a short-lived signed URL so the bytes never pass
+    # through the app servers
+    url = storage.download_url(paper.file_path, paper.filename)
+    if url:
+        if record_access(paper) is not None:
+            db.session.commit()
+        return redirect(url)
+
+    path = storage.local_path(paper.file_path)
+    if not storage.exists(paper.file_path):
+        abort(404)
+    response = send_file(path, as_attachment=True, download_name=paper.filename)
+    if response.status_code == 200 and record_access(paper) is not None:
+        db.session.commit()
+    return response
\ No newline at end of file
@@ -0,0 +1,299 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from models import db, QuestionPaper, FileFingerprint, PackedPaper
+from changes import record_change, DELETE
+from stats import paper_removed
+from tiering import forget_papers
+
+logger = logging.getLogger(__name__)
+
+MISSING = 'missing'
+SIZE_MISMATCH = 'size_mismatch'
+CHECKSUM_MISMATCH = 'checksum_mismatch'
+UNREADABLE = 'unreadable'
+OK = 'ok'
+
+
+class Throttle:
+    def __init__(self, bytes_per_second):
+        self.rate = bytes_per_second
+        self.lock = threading.Lock()
+        self.available_at = time.monotonic()
+
+    def consume(self, nbytes):
+        if not self.rate:
+            return
+        # Each read books the next slot on a shared clock, so all worker
+        # threads together stay under the configured rate.
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.available_at)
+            self.available_at = start + nbytes / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+class Checkpoint:
+    def __init__(self, path):
+        self.path = path
+        self.state = self.fresh()
+
+    @staticmethod
+    def fresh():
+        return {
+            'started_at': datetime.utcnow().isoformat(),
+            'last_paper_id': 0,
+            'last_file_key': '',
+            'rows_done': False,
+            'files_done': False,
+            'report': {
+                'rows_checked': 0,
+                'files_checked': 0,
+                'fingerprinted': 0,
+                'missing': [],
+                'size_mismatch': [],
+                'checksum_mismatch': [],
+                'unreadable': [],
+                'orphans': [],
+                'repaired_rows': 0,
+                'repaired_orphans': 0
+            }
+        }
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.state = json.load(f)
+            # Checkpoints written before unreadable files were tracked
+            self.state['report'].setdefault('unreadable', [])
+        return self.state
+
+    def save(self):
+        # Write then rename so an interrupted scrub never leaves a torn file
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        self.state = self.fresh()
+        self.save()
+
+    @property
+    def finished(self):
+        return self.state['rows_done'] and self.state['files_done']
+
+
+class Scrubber:
+    def __init__(self, app, storage, checkpoint, workers=4, bytes_per_second=0,
+                 verify_checksums=True, repair=False, batch_size=200, orphan_grace=3600):
+        self.app = app
+        self.storage = storage
+        self.checkpoint = checkpoint
+        self.workers = workers
+        self.throttle = Throttle(bytes_per_second)
+        self.verify_checksums = verify_checksums
+        self.repair = repair
+        self.batch_size = batch_size
+        self.orphan_grace = orphan_grace
+        self.lock = threading.Lock()
+
+    def run(self, limit=None):
+        self.checkpoint.load()
+        if self.checkpoint.finished:
+            self.checkpoint.reset()
+        state = self.checkpoint.state
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # The upload tree is walked on its own thread while the DB walk
+            # feeds file checks to the pool.
+            files_thread = None
+            if not state['files_done']:
+                files_thread = threading.Thread(target=self._walk_files, args=(limit,), daemon=True)
+                files_thread.start()
+
+            if not state['rows_done']:
+                self._walk_rows(pool, limit)
+
+            if files_thread is not None:
+                files_thread.join()
+
+        self.checkpoint.save()
+        return state['report']
+
+    # Only FileNotFoundError means missing. Permission, I/O and network
+    # errors are reported as unreadable and never reach the repair path, so a
+    # flaky read cannot delete a catalog row.
+    def _verify(self, key, expected):
+        try:
+            size = self.storage.size(key)
+            if expected is not None and size != expected.size:
+                return SIZE_MISMATCH, None
+            if not self.verify_checksums and expected is not None:
+                return OK, None
+
+            digest = hashlib.sha256()
+            with self.storage.open(key) as f:
+                for chunk in iter(lambda: f.read(64 * 1024), b''):
+                    self.throttle.consume(len(chunk))
+                    digest.update(chunk)
+        except FileNotFoundError:
+            return MISSING, None
+        except Exception:
+            logger.exception('Could not read %s', key)
+            return UNREADABLE, None
+
+        return self._compare(size, digest.hexdigest(), expected)
+
+    def _verify_packed(self, pack_key, offset, length, expected):
+        try:
+            compressed = self.storage.read_range(pack_key, offset, length)
+        except FileNotFoundError:
+            return MISSING, None
+        except Exception:
+            logger.exception('Could not read %s', pack_key)
+            return UNREADABLE, None
+        self.throttle.consume(len(compressed))
+
+        try:
+            data = zlib.decompress(compressed)
+        except zlib.error:
+            return CHECKSUM_MISMATCH, None
+        if expected is not None and len(data) != expected.size:
+            return SIZE_MISMATCH, None
+        return self._compare(len(data), hashlib.sha256(data).hexdigest(), expected)
+
+    def _compare(self, size, sha256, expected):
+        if expected is None:
+            return OK, (size, sha256)
+        if sha256 != expected.sha256:
+            return CHECKSUM_MISMATCH, None
+        return OK, None
+
+    def _walk_rows(self, pool, limit):
+        state = self.checkpoint.state
+        report = state['report']
+        checked = 0
+
+        while limit is None or checked < limit:
+            batch_size = self.batch_size if limit is None else min(self.batch_size, limit - checked)
+            papers = QuestionPaper.query.filter(
+                QuestionPaper.id > state['last_paper_id']
+            ).order_by(QuestionPaper.id).limit(batch_size).all()
+            if not papers:
+                state['rows_done'] = True
+                break
+
+            futures = []
+            for paper in papers:
+                if paper.packed is not None:
+                    packed = paper.packed
+                    future = pool.submit(self._verify_packed, packed.pack_key, packed.offset,
+                                         packed.length, paper.fingerprint)
+                else:
+                    future = pool.submit(self._verify, paper.file_path, paper.fingerprint)
+                futures.append((paper, future))
+            results = [(paper, future.result()) for paper, future in futures]
+
+            with self.lock:
+                for paper, (status, measured) in results:
+                    if status == OK:
+                        if measured is not None:
+                            # First sighting: trust what is stored from now on
+                            db.session.add(FileFingerprint(paper_id=paper.id, size=measured[0], sha256=measured[1]))
+                            report['fingerprinted'] += 1
+                        elif paper.fingerprint is not None:
+                            paper.fingerprint.verified_at = datetime.utcnow()
+                    elif status == MISSING and self.repair:
+                        db.session.delete(paper)
+                        record_change('paper', paper.id, DELETE)
+                        paper_removed(paper)
+                        forget_papers([paper.id])
+                        report['repaired_rows'] += 1
+                    else:
+                        report[status].append({'paper_id': paper.id, 'file_path': paper.file_path})
+
+                db.session.commit()
+                report['rows_checked'] += len(papers)
+                state['last_paper_id'] = papers[-1].id
+                self.checkpoint.save()
+            checked += len(papers)
+
+    def _walk_files(self, limit):
+        state = self.checkpoint.state
+
+        with self.app.app_context():
+            batch = []
+            checked = 0
+            finished = True
+            # The listing itself resumes after the checkpoint, so a --limit run
+            # only reads the part of the store it goes on to check
+            for key in self.storage.list_keys(start_after=state['last_file_key']):
+                if limit is not None and checked >= limit:
+                    finished = False
+                    break
+                batch.append(key)
+                checked += 1
+                if len(batch) >= self.batch_size:
+                    self._check_orphans(batch)
+                    batch = []
+            if batch:
+                self._check_orphans(batch)
+            with self.lock:
+                state['files_done'] = finished
+                self.checkpoint.save()
+
+    def _check_orphans(self, keys):
+        state = self.checkpoint.state
+        report = state['report']
+
+        # Rows written before the storage layer hold absolute local paths
+        candidates = {}
+        for key in keys:
+            candidates[key] = key
+            local_path = self.storage.local_path(key)
+            if local_path:
+                candidates[local_path] = key
+
+        known = {
+            candidates[row.file_path]
+            for row in db.session.query(QuestionPaper.file_path).filter(
+                QuestionPaper.file_path.in_(list(candidates))
+            )
+        }
+        known.update(
+            row.pack_key
+            for row in db.session.query(PackedPaper.pack_key).filter(
+                PackedPaper.pack_key.in_(keys)
+            ).distinct()
+        )
+        db.session.remove()
+
+        now = time.time()
+        for key in keys:
+            if key in known:
+                continue
+            # A file this young may belong to an upload whose row has not
+            # been committed yet
+            if now - self.storage.modified_time(key) < self.orphan_grace:
+                continue
+            if self.repair:
+                self.storage.delete(key)
+                with self.lock:
+                    report['repaired_orphans'] += 1
+            else:
+                with self.lock:
+                    report['orphans'].append(key)
+
+        with self.lock:
+            report['files_checked'] += len(keys)
+            state['last_file_key'] = keys[-1]
+            self.checkpoint.save()
@@ -0,0 +1,143 @@
+from sqlalchemy.exc import IntegrityError
+from models import db, QuestionPaper, PaperStats, UploaderStats
+
+# paper_stats and uploader_stats are denormalized counters over
+# question_paper. Every write that adds, moves or removes papers updates them
+# in the same transaction, so reads never have to scan question_paper.
+
+
+def _increment(model, key, values, row):
+    # UPDATE ... SET paper_count = paper_count + 1 is atomic in the database,
+    # so concurrent uploads to the same group never lose an increment
+    query = model.query.filter_by(**key)
+    if query.update(values, synchronize_session=False):
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(row)
+    except IntegrityError:
+        # Another transaction created the row first; count on top of it
+        query.update(values, synchronize_session=False)
+
+
+def _decrement(model, key):
+    query = model.query.filter_by(**key)
+    query.update({model.paper_count: model.paper_count - 1}, synchronize_session=False)
+    query.filter(model.paper_count <= 0).delete(synchronize_session=False)
+
+
+def paper_added(paper):
+    group = {'course_id': paper.course_id, 'year': paper.year, 'semester': paper.semester}
+    _increment(PaperStats, group, {
+        PaperStats.paper_count: PaperStats.paper_count + 1,
+        PaperStats.latest_upload: db.case(
+            (db.or_(PaperStats.latest_upload.is_(None), PaperStats.latest_upload < paper.created_at),
+             paper.created_at),
+            else_=PaperStats.latest_upload
+        )
+    }, PaperStats(paper_count=1, latest_upload=paper.created_at, **group))
+
+    _increment(UploaderStats, {'user_id': paper.uploaded_by}, {
+        UploaderStats.paper_count: UploaderStats.paper_count + 1
+    }, UploaderStats(user_id=paper.uploaded_by, paper_count=1))
+
+
+def paper_removed(paper):
+    group = {'course_id': paper.course_id, 'year': paper.year, 'semester': paper.semester}
+    _decrement(PaperStats, group)
+    latest = db.session.query(db.func.max(QuestionPaper.created_at)).filter(
+        QuestionPaper.course_id == paper.course_id,
+        QuestionPaper.year == paper.year,
+        QuestionPaper.semester == paper.semester,
+        QuestionPaper.id != paper.id
+    ).scalar_subquery()
+    PaperStats.query.filter_by(**group).filter(
+        PaperStats.latest_upload == paper.created_at
+    ).update({PaperStats.latest_upload: latest}, synchronize_session=False)
+
+    _decrement(UploaderStats, {'user_id': paper.uploaded_by})
+
+
+def refresh_groups(groups):
+    # Recount only the affected (course, year, semester) groups
+    for course_id, year, semester in set(groups):
+        count, latest = db.session.query(
+            db.func.count(QuestionPaper.id),
+            db.func.max(QuestionPaper.created_at)
+        ).filter_by(course_id=course_id, year=year, semester=semester).one()
+
+        stats = db.session.get(PaperStats, (course_id, year, semester))
+        if count == 0:
+            if stats is not None:
+                db.session.delete(stats)
+            continue
+        if stats is None:
+            stats = PaperStats(course_id=course_id, year=year, semester=semester)
+            db.session.add(stats)
+        stats.paper_count = count
+        stats.latest_upload = latest
+
+
+def refresh_uploaders(user_ids):
+    for user_id in set(user_ids):
+        count = QuestionPaper.query.filter_by(uploaded_by=user_id).count()
+        stats = db.session.get(UploaderStats, user_id)
+        if count == 0:
+            if stats is not None:
+                db.session.delete(stats)
+            continue
+        if stats is None:
+            stats = UploaderStats(user_id=user_id)
+            db.session.add(stats)
+        stats.paper_count = count
+
+
+def course_has_papers(course_id):
+    return db.session.query(PaperStats.course_id).filter_by(course_id=course_id).first() is not None
+
+
+def user_has_papers(user_id):
+    return db.session.get(UploaderStats, user_id) is not None
+
+
+def course_paper_counts():
+    rows = db.session.query(
+        PaperStats.course_id,
+        db.func.sum(PaperStats.paper_count)
+    ).group_by(PaperStats.course_id).all()
+    return {course_id: int(count) for course_id, count in rows}
+
+
+def rebuild_stats():
+    PaperStats.query.delete()
+    UploaderStats.query.delete()
+
+    groups = db.session.query(
+        QuestionPaper.course_id,
+        QuestionPaper.year,
+        QuestionPaper.semester,
+        db.func.count(QuestionPaper.id),
+        db.func.max(QuestionPaper.created_at)
+    ).group_by(QuestionPaper.course_id, QuestionPaper.year, QuestionPaper.semester).all()
+    db.session.add_all([
+        PaperStats(course_id=course_id, year=year, semester=semester,
+                   paper_count=count, latest_upload=latest)
+        for course_id, year, semester, count, latest in groups
+    ])
+
+    uploaders = db.session.query(
+        QuestionPaper.uploaded_by,
+        db.func.count(QuestionPaper.id)
+    ).group_by(QuestionPaper.uploaded_by).all()
+    db.session.add_all([
+        UploaderStats(user_id=user_id, paper_count=count)
+        for user_id, count in uploaders
+    ])
+
+    db.session.commit()
+
+
+def ensure_stats():
+    # Databases created before the stats tables existed start out empty
+    if PaperStats.query.first() is None and QuestionPaper.query.first() is not None:
+        rebuild_stats()
@@ -0,0 +1,255 @@
+import hashlib
+import logging
+import os
+import queue
+import shutil
+import threading
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+def paper_key(year, semester, course_id, filename):
+    return f"{year}_{semester}_{course_id}/{filename}"
+
+
+def fingerprint(fileobj, chunk_size=64 * 1024):
+    # Returns (size, sha256 hex) and rewinds seekable streams for saving
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    if fileobj.seekable():
+        fileobj.seek(0)
+    return size, digest.hexdigest()
+
+
+class LocalStorage:
+    def __init__(self, root):
+        self.root = str(root)
+
+    def _path(self, key):
+        # Rows written before the storage layer existed hold absolute paths;
+        # os.path.join keeps those untouched.
+        return os.path.join(self.root, key)
+
+    def save(self, fileobj, key):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as out:
+            shutil.copyfileobj(fileobj, out)
+        return key
+
+    def open(self, key):
+        return open(self._path(key), 'rb')
+
+    def read_range(self, key, offset, length):
+        with open(self._path(key), 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def exists(self, key):
+        return os.path.isfile(self._path(key))
+
+    def size(self, key):
+        return os.path.getsize(self._path(key))
+
+    def modified_time(self, key):
+        return os.path.getmtime(self._path(key))
+
+    def list_keys(self, prefix='', start_after=''):
+        # Yields keys in the same order as an S3 listing. Directories are
+        # sorted as "name/" so that holds across levels, and whole subtrees
+        # that sort before start_after are skipped without being read.
+        def walk(path, rel):
+            try:
+                entries = list(os.scandir(path))
+            except FileNotFoundError:
+                return
+            entries.sort(key=lambda e: e.name + '/' if e.is_dir() else e.name)
+            for entry in entries:
+                key = rel + entry.name
+                if entry.is_dir():
+                    key += '/'
+                    if key < start_after and not start_after.startswith(key):
+                        continue
+                    yield from walk(entry.path, key)
+                elif key > start_after:
+                    yield key
+
+        rel = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        return walk(os.path.join(self.root, rel), rel)
+
+    def local_path(self, key):
+        return self._path(key)
+
+    def download_url(self, key, download_name, expires_in=None):
+        return None
+
+
+class S3Storage:
+    def __init__(self, bucket, prefix='', endpoint_url=None, region_name=None,
+                 access_key=None, secret_key=None, url_expiry=300,
+                 multipart_threshold=8 * 1024 * 1024, multipart_chunksize=8 * 1024 * 1024):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+        except ImportError:
+            raise RuntimeError('STORAGE_BACKEND=s3 requires the boto3 package')
+
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.url_expiry = url_expiry
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url,
+            region_name=region_name,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key
+        )
+        # upload_fileobj switches to a multipart upload above the threshold
+        # and sends the parts concurrently.
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize
+        )
+
+    def _object_key(self, key):
+        key = key.replace(os.sep, '/').lstrip('/')
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _call(self, method, key, **kwargs):
+        # Absent objects raise FileNotFoundError like LocalStorage does, so
+        # callers can tell them apart from other failures on either backend
+        from botocore.exceptions import ClientError
+        try:
+            return method(Bucket=self.bucket, Key=self._object_key(key), **kwargs)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                raise FileNotFoundError(key) from e
+            raise
+
+    def save(self, fileobj, key):
+        self.client.upload_fileobj(fileobj, self.bucket, self._object_key(key),
+                                   Config=self.transfer_config)
+        return key
+
+    def open(self, key):
+        response = self._call(self.client.get_object, key)
+        return response['Body']
+
+    def read_range(self, key, offset, length):
+        response = self._call(self.client.get_object, key, Range=f"bytes={offset}-{offset + length - 1}")
+        return response['Body'].read()
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def exists(self, key):
+        try:
+            self._call(self.client.head_object, key)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def size(self, key):
+        return self._call(self.client.head_object, key)['ContentLength']
+
+    def modified_time(self, key):
+        return self._call(self.client.head_object, key)['LastModified'].timestamp()
+
+    def list_keys(self, prefix='', start_after=''):
+        full_prefix = self._object_key(prefix) if prefix else (f"{self.prefix}/" if self.prefix else '')
+        params = {'Bucket': self.bucket, 'Prefix': full_prefix}
+        if start_after:
+            params['StartAfter'] = self._object_key(start_after)
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(**params):
+            for obj in page.get('Contents', []):
+                key = obj['Key']
+                if self.prefix:
+                    key = key[len(self.prefix) + 1:]
+                yield key
+
+    def local_path(self, key):
+        return None
+
+    def download_url(self, key, download_name, expires_in=None):
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={
+                'Bucket': self.bucket,
+                'Key': self._object_key(key),
+                'ResponseContentDisposition': f'attachment; filename="{download_name}"'
+            },
+            ExpiresIn=expires_in or self.url_expiry
+        )
+
+
+class FileSweeper:
+    def __init__(self, storage):
+        self.storage = storage
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def submit(self, keys):
+        for key in keys:
+            self.queue.put(key)
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='file-sweeper', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            key = self.queue.get()
+            try:
+                self.storage.delete(key)
+            except Exception:
+                logger.exception('Failed to delete %s', key)
+            finally:
+                self.queue.task_done()
+
+    def wait(self):
+        self.queue.join()
+
+
+def create_storage(config):
+    backend = config.get('STORAGE_BACKEND', 'local')
+    if backend == 'local':
+        return LocalStorage(config['UPLOAD_FOLDER'])
+    if backend == 's3':
+        return S3Storage(
+            bucket=config['S3_BUCKET'],
+            prefix=config.get('S3_PREFIX', ''),
+            endpoint_url=config.get('S3_ENDPOINT_URL'),
+            region_name=config.get('S3_REGION'),
+            access_key=config.get('S3_ACCESS_KEY_ID'),
+            secret_key=config.get('S3_SECRET_ACCESS_KEY'),
+            url_expiry=config.get('S3_URL_EXPIRY', 300),
+            multipart_threshold=config.get('S3_MULTIPART_THRESHOLD', 8 * 1024 * 1024),
+            multipart_chunksize=config.get('S3_MULTIPART_CHUNKSIZE', 8 * 1024 * 1024)
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+def init_storage(app):
+    app.extensions['storage'] = create_storage(app.config)
+    app.extensions['file_sweeper'] = FileSweeper(app.extensions['storage'])
+
+
+def get_storage():
+    return current_app.extensions['storage']
+
+
+def delete_later(keys):
+    # Only call after the rows pointing at these files have been committed
+    current_app.extensions['file_sweeper'].submit(keys)
@@ -0,0 +1,183 @@
+import bisect
+import threading
+import time
+from flask import current_app
+from models import db, ChangeLog, Course, QuestionPaper
+from changes import current_version, compaction_horizon, DELETE
+
+SUBJECT, TITLE, COURSE = 'subject', 'title', 'course'
+
+# A narrow scope with a one-letter prefix could otherwise walk most of the
+# index; past this many entries the answer is cut short instead.
+MAX_SCAN = 5000
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+def word_suffixes(text):
+    # "Data Structures" is found by both "dat" and "str"
+    words = normalize(text).split(' ')
+    return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+def paper_rows():
+    return db.session.query(
+        QuestionPaper.id, QuestionPaper.title, QuestionPaper.subject,
+        QuestionPaper.course_id, QuestionPaper.year, QuestionPaper.semester
+    )
+
+
+class PrefixIndex:
+    def __init__(self):
+        # Sorted (key, kind, text, entity_id) tuples; a prefix lookup is one
+        # bisect followed by a short forward scan.
+        self.entries = []
+        self.entity_entries = {}
+        self.scopes = {}
+        self.version = None
+        self.checked_at = 0
+        self.lock = threading.Lock()
+
+    def _index(self, entity, entity_id, texts):
+        entries = [
+            (key, kind, text, entity_id)
+            for kind, text in texts
+            for key in word_suffixes(text)
+        ]
+        for entry in entries:
+            bisect.insort(self.entries, entry)
+        self.entity_entries[(entity, entity_id)] = entries
+
+    def _remove(self, entity, entity_id):
+        for entry in self.entity_entries.pop((entity, entity_id), []):
+            index = bisect.bisect_left(self.entries, entry)
+            if index < len(self.entries) and self.entries[index] == entry:
+                del self.entries[index]
+        if entity == 'paper':
+            self.scopes.pop(entity_id, None)
+
+    def _put_paper(self, row):
+        self._remove('paper', row.id)
+        self._index('paper', row.id, ((TITLE, row.title), (SUBJECT, row.subject)))
+        self.scopes[row.id] = (row.course_id, row.year, row.semester)
+
+    def _put_course(self, row):
+        self._remove('course', row.id)
+        self._index('course', row.id, ((COURSE, row.code),))
+
+    def _rebuild(self):
+        # The version is read first so writes racing the load are replayed
+        # by the next refresh instead of being lost. It never sits below the
+        # compaction horizon, or every refresh would rebuild again.
+        version = current_version()
+        self.entries = []
+        self.entity_entries = {}
+        self.scopes = {}
+
+        for paper in paper_rows():
+            entries = [
+                (key, kind, text, paper.id)
+                for kind, text in ((TITLE, paper.title), (SUBJECT, paper.subject))
+                for key in word_suffixes(text)
+            ]
+            self.entries.extend(entries)
+            self.entity_entries[('paper', paper.id)] = entries
+            self.scopes[paper.id] = (paper.course_id, paper.year, paper.semester)
+        for course in db.session.query(Course.id, Course.code):
+            entries = [(key, COURSE, course.code, course.id) for key in word_suffixes(course.code)]
+            self.entries.extend(entries)
+            self.entity_entries[('course', course.id)] = entries
+
+        self.entries.sort()
+        self.version = version
+
+    def _apply_changes(self):
+        changes = ChangeLog.query.filter(ChangeLog.version > self.version).order_by(ChangeLog.version).all()
+        if not changes:
+            return
+
+        paper_ids = [c.entity_id for c in changes if c.entity == 'paper' and c.op != DELETE]
+        course_ids = [c.entity_id for c in changes if c.entity == 'course' and c.op != DELETE]
+        papers = {
+            row.id: row for row in paper_rows().filter(QuestionPaper.id.in_(paper_ids))
+        } if paper_ids else {}
+        courses = {
+            row.id: row for row in db.session.query(Course.id, Course.code).filter(Course.id.in_(course_ids))
+        } if course_ids else {}
+
+        for change in changes:
+            if change.entity == 'paper':
+                row = papers.get(change.entity_id)
+                if row is None:
+                    self._remove('paper', change.entity_id)
+                else:
+                    self._put_paper(row)
+            elif change.entity == 'course':
+                row = courses.get(change.entity_id)
+                if row is None:
+                    self._remove('course', change.entity_id)
+                else:
+                    self._put_course(row)
+        self.version = changes[-1].version
+
+    def refresh(self):
+        # Writes on any app node land in the change log, so catching up from
+        # it keeps every node's index current without a full rebuild.
+        now = time.monotonic()
+        with self.lock:
+            if self.version is not None and now - self.checked_at < current_app.config['SUGGEST_REFRESH_INTERVAL']:
+                return
+            self.checked_at = now
+            if self.version is None or self.version < compaction_horizon():
+                self._rebuild()
+            else:
+                self._apply_changes()
+
+    def search(self, prefix, limit=10, course_id=None, year=None, semester=None):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        scoped = course_id is not None or year is not None or semester is not None
+        results = []
+        seen = set()
+        with self.lock:
+            index = bisect.bisect_left(self.entries, (prefix,))
+            end = min(len(self.entries), index + MAX_SCAN)
+            while index < end and len(results) < limit:
+                key, kind, text, entity_id = self.entries[index]
+                index += 1
+                if not key.startswith(prefix):
+                    break
+                if scoped:
+                    if kind == COURSE:
+                        if course_id is not None and entity_id != course_id:
+                            continue
+                    else:
+                        scope = self.scopes.get(entity_id)
+                        if scope is None:
+                            continue
+                        if ((course_id is not None and scope[0] != course_id)
+                                or (year is not None and scope[1] != year)
+                                or (semester is not None and scope[2] != semester)):
+                            continue
+                if (kind, text) in seen:
+                    continue
+                seen.add((kind, text))
+                result = {'type': kind, 'text': text}
+                if kind == TITLE:
+                    result['paper_id'] = entity_id
+                results.append(result)
+        return results
+
+
+def init_suggest(app):
+    app.extensions['suggest_index'] = PrefixIndex()
+
+
+def get_suggest_index():
+    index = current_app.extensions['suggest_index']
+    index.refresh()
+    return index
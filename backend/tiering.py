@@ -0,0 +1,195 @@
+import io
+import tempfile
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+from models import db, QuestionPaper, PackedPaper, PaperAccess
+from storage import get_storage
+
+PACK_PREFIX = 'packs/'
+
+# Old papers are moved out of the per-semester upload folders into pack
+# files: each paper is compressed on its own with zlib and appended to a pack,
+# and packed_paper records where it landed. Reading one back is a single
+# ranged read plus a decompress, so downloads never touch the rest of the pack.
+
+
+class DecompressionCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    # Entries remember the pack location they were read from. Another
+    # process may delete a paper and a new one may reuse its id, and the new
+    # paper always lands at a different location, so its lookups miss.
+    def get(self, paper_id, location):
+        with self.lock:
+            entry = self.entries.get(paper_id)
+            if entry is None or entry[0] != location:
+                return None
+            self.entries.move_to_end(paper_id)
+            return entry[1]
+
+    def put(self, paper_id, location, data):
+        if len(data) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(paper_id, None)
+            if old is not None:
+                self.size -= len(old[1])
+            self.entries[paper_id] = (location, data)
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def discard(self, paper_id):
+        with self.lock:
+            old = self.entries.pop(paper_id, None)
+            if old is not None:
+                self.size -= len(old[1])
+
+
+def init_tiering(app):
+    app.extensions['tier_cache'] = DecompressionCache(app.config['TIER_CACHE_BYTES'])
+
+
+def forget_papers(paper_ids):
+    # Deleted ids can be reused by new papers (SQLite hands the highest one
+    # out again), so their cached bytes must not outlive them
+    cache = current_app.extensions['tier_cache']
+    for paper_id in paper_ids:
+        cache.discard(paper_id)
+
+
+def cold_year_cutoff():
+    return datetime.utcnow().year - current_app.config['TIER_HOT_YEARS']
+
+
+def read_packed(packed):
+    cache = current_app.extensions['tier_cache']
+    location = (packed.pack_key, packed.offset)
+    data = cache.get(packed.paper_id, location)
+    if data is None:
+        compressed = get_storage().read_range(packed.pack_key, packed.offset, packed.length)
+        data = zlib.decompress(compressed)
+        cache.put(packed.paper_id, location, data)
+    return data
+
+
+def record_access(paper):
+    # Only papers old enough to be cold are tracked, which keeps the
+    # bookkeeping writes off the busy recent-years download path.
+    if paper.year > cold_year_cutoff():
+        return None
+
+    now = datetime.utcnow()
+    window = timedelta(seconds=current_app.config['TIER_ACCESS_WINDOW'])
+    access = paper.access
+    if access is None:
+        access = PaperAccess(paper_id=paper.id, hits=0, window_start=now, last_access=now)
+        db.session.add(access)
+    elif now - access.window_start > window:
+        access.hits = 0
+        access.window_start = now
+    access.hits += 1
+    access.last_access = now
+    return access
+
+
+def should_promote(access):
+    return access is not None and access.hits >= current_app.config['TIER_PROMOTE_HITS']
+
+
+def promote(paper, data):
+    # The hot copy is written before the index row goes away, so a failure
+    # in between leaves the paper readable from the pack
+    get_storage().save(io.BytesIO(data), paper.file_path)
+    PackedPaper.query.filter_by(paper_id=paper.id).delete(synchronize_session=False)
+    current_app.extensions['tier_cache'].discard(paper.id)
+
+
+def demotion_candidates(limit=None):
+    cooldown = datetime.utcnow() - timedelta(days=current_app.config['TIER_COOLDOWN_DAYS'])
+    recently_used = db.session.query(PaperAccess.paper_id).filter(PaperAccess.last_access >= cooldown)
+    already_packed = db.session.query(PackedPaper.paper_id)
+
+    query = QuestionPaper.query.filter(
+        QuestionPaper.year <= cold_year_cutoff(),
+        ~QuestionPaper.id.in_(already_packed),
+        ~QuestionPaper.id.in_(recently_used)
+    ).order_by(QuestionPaper.year, QuestionPaper.id)
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+def write_pack(storage, year, papers, max_bytes):
+    # Returns the papers that made it into the pack with their index rows
+    pack_key = f"{PACK_PREFIX}{year}/pack-{datetime.utcnow():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}.pack"
+    entries = []
+    with tempfile.TemporaryFile() as pack:
+        for paper in papers:
+            if entries and pack.tell() >= max_bytes:
+                break
+            if not storage.exists(paper.file_path):
+                continue
+            with storage.open(paper.file_path) as f:
+                raw = f.read()
+            compressed = zlib.compress(raw, 6)
+            entries.append((paper, PackedPaper(
+                paper_id=paper.id,
+                pack_key=pack_key,
+                offset=pack.tell(),
+                length=len(compressed),
+                raw_size=len(raw)
+            )))
+            pack.write(compressed)
+
+        if entries:
+            pack.seek(0)
+            storage.save(pack, pack_key)
+    return entries
+
+
+def demote(limit=None):
+    storage = get_storage()
+    max_bytes = current_app.config['TIER_PACK_MAX_BYTES']
+
+    by_year = OrderedDict()
+    for paper in demotion_candidates(limit):
+        by_year.setdefault(paper.year, []).append(paper)
+
+    demoted = 0
+    for year, papers in by_year.items():
+        while papers:
+            entries = write_pack(storage, year, papers, max_bytes)
+            if not entries:
+                break
+            packed_ids = {paper.id for paper, _ in entries}
+            papers = [paper for paper in papers if paper.id > max(packed_ids)]
+
+            db.session.add_all([entry for _, entry in entries])
+            db.session.commit()
+
+            # Hot copies are only removed once the pack index is committed
+            for paper, _ in entries:
+                storage.delete(paper.file_path)
+            demoted += len(entries)
+    return demoted
+
+
+def remove_dead_packs():
+    storage = get_storage()
+    live = {row.pack_key for row in db.session.query(PackedPaper.pack_key).distinct()}
+    removed = 0
+    for key in storage.list_keys(PACK_PREFIX):
+        if key not in live:
+            storage.delete(key)
+            removed += 1
+    return removed
@@ -0,0 +1,177 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const panel = document.getElementById('papers-panel');
+    if (!panel) {
+        return;
+    }
+
+    const ROW_HEIGHT = 44;
+    const PAGE_SIZE = 50;
+    const OVERSCAN = 10;
+
+    const viewport = document.getElementById('paper-viewport');
+    const spacer = document.getElementById('paper-spacer');
+    const countLabel = document.getElementById('paper-count');
+    const emptyAlert = document.getElementById('paper-empty');
+    const papersUrl = panel.getAttribute('data-papers-url');
+
+    const state = {
+        sort: 'created_at',
+        order: 'desc',
+        filters: {},
+        total: 0,
+        pages: new Map(),
+        pending: new Set(),
+        generation: 0
+    };
+
+    function escapeHtml(value) {
+        const div = document.createElement('div');
+        div.textContent = value;
+        return div.innerHTML;
+    }
+
+    function loadPage(page) {
+        if (state.pages.has(page) || state.pending.has(page)) {
+            return;
+        }
+        state.pending.add(page);
+        const generation = state.generation;
+
+        const params = new URLSearchParams(Object.assign({
+            page: page,
+            per_page: PAGE_SIZE,
+            sort: state.sort,
+            order: state.order
+        }, state.filters));
+
+        fetch(`${papersUrl}?${params}`, { credentials: 'same-origin' })
+            .then(response => response.json())
+            .then(data => {
+                // Ignore pages requested before the filters or sort changed
+                if (generation !== state.generation) {
+                    return;
+                }
+                state.pending.delete(page);
+                if (!data.success) {
+                    showAlert(data.error, 'danger');
+                    return;
+                }
+                state.total = data.total;
+                state.pages.set(page, data.papers);
+                spacer.style.height = `${state.total * ROW_HEIGHT}px`;
+                countLabel.textContent = `${state.total} question papers`;
+                emptyAlert.classList.toggle('d-none', state.total > 0);
+                render();
+            })
+            .catch(() => state.pending.delete(page));
+    }
+
+    function rowHtml(paper) {
+        return `
+            <span>${escapeHtml(paper.title)}</span>
+            <span><span class="badge bg-secondary">${escapeHtml(paper.course_code)}</span></span>
+            <span>${paper.year}</span>
+            <span>${paper.semester}</span>
+            <span>${escapeHtml(paper.subject)}</span>
+            <span>${paper.created_at}</span>
+            <span>
+                <div class="btn-group btn-group-sm">
+                    <a href="${paper.download_url}" class="btn btn-outline-primary btn-sm">
+                        <i class="fas fa-download"></i>
+                    </a>
+                    <a href="${paper.delete_url}" class="btn btn-outline-danger btn-sm paper-delete">
+                        <i class="fas fa-trash"></i>
+                    </a>
+                </div>
+            </span>`;
+    }
+
+    // Only the rows inside the visible window (plus a small margin) exist in
+    // the DOM; the spacer keeps the scrollbar sized for the full result set.
+    function render() {
+        const first = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - OVERSCAN);
+        const visible = Math.ceil(viewport.clientHeight / ROW_HEIGHT) + OVERSCAN * 2;
+        const last = Math.min(state.total || PAGE_SIZE, first + visible);
+
+        const rows = [];
+        for (let index = first; index < last; index++) {
+            const page = Math.floor(index / PAGE_SIZE) + 1;
+            const papers = state.pages.get(page);
+            if (!papers) {
+                loadPage(page);
+                continue;
+            }
+            const paper = papers[index % PAGE_SIZE];
+            if (paper) {
+                rows.push(`<div class="paper-grid-row" style="top: ${index * ROW_HEIGHT}px">${rowHtml(paper)}</div>`);
+            }
+        }
+        spacer.innerHTML = rows.join('');
+    }
+
+    function reset() {
+        state.generation += 1;
+        state.pages.clear();
+        state.pending.clear();
+        state.total = 0;
+        viewport.scrollTop = 0;
+        spacer.innerHTML = '';
+        loadPage(1);
+    }
+
+    function readFilters() {
+        const filters = {
+            q: document.getElementById('paper-search').value.trim(),
+            course_id: document.getElementById('paper-course-filter').value,
+            year: document.getElementById('paper-year-filter').value,
+            semester: document.getElementById('paper-semester-filter').value
+        };
+        state.filters = {};
+        Object.keys(filters).forEach(key => {
+            if (filters[key]) {
+                state.filters[key] = filters[key];
+            }
+        });
+        reset();
+    }
+
+    let scrollFrame = null;
+    viewport.addEventListener('scroll', function() {
+        if (scrollFrame === null) {
+            scrollFrame = requestAnimationFrame(function() {
+                scrollFrame = null;
+                render();
+            });
+        }
+    });
+
+    let searchTimer = null;
+    document.getElementById('paper-search').addEventListener('input', function() {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(readFilters, 250);
+    });
+    ['paper-course-filter', 'paper-year-filter', 'paper-semester-filter'].forEach(id => {
+        document.getElementById(id).addEventListener('change', readFilters);
+    });
+
+    panel.querySelectorAll('.sortable').forEach(header => {
+        header.addEventListener('click', function() {
+            const sort = this.getAttribute('data-sort');
+            state.order = state.sort === sort && state.order === 'asc' ? 'desc' : 'asc';
+            state.sort = sort;
+            panel.querySelectorAll('.sortable').forEach(h => h.classList.remove('sorted-asc', 'sorted-desc'));
+            this.classList.add(`sorted-${state.order}`);
+            reset();
+        });
+    });
+
+    spacer.addEventListener('click', function(e) {
+        const link = e.target.closest('.paper-delete');
+        if (link && !confirm('Are you sure you want to delete this paper?')) {
+            e.preventDefault();
+        }
+    });
+
+    panel.querySelector('[data-sort="created_at"]').classList.add('sorted-desc');
+    loadPage(1);
+});
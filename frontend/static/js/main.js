@@ -1,3 +1,11 @@
+if ('serviceWorker' in navigator) {
+    window.addEventListener('load', function() {
+        navigator.serviceWorker.register('/sw.js').catch(function(err) {
+            console.warn('Service worker registration failed:', err);
+        });
+    });
+}
+
 document.addEventListener('DOMContentLoaded', function() {
     const currentPath = window.location.pathname;
     const navLinks = document.querySelectorAll('.navbar-nav .nav-link');
@@ -80,6 +88,49 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
             });
         });
+
+        const suggestUrl = searchInput.getAttribute('data-suggest-url');
+        const suggestionList = document.getElementById('search-suggestions');
+        if (suggestUrl && suggestionList) {
+            let suggestTimer = null;
+            let suggestSeq = 0;
+
+            searchInput.addEventListener('input', function() {
+                clearTimeout(suggestTimer);
+                const q = searchInput.value.trim();
+                if (!q) {
+                    suggestionList.innerHTML = '';
+                    return;
+                }
+
+                suggestTimer = setTimeout(function() {
+                    const seq = ++suggestSeq;
+                    const params = new URLSearchParams({ q: q, limit: 8 });
+                    const courseId = searchInput.getAttribute('data-course-id');
+                    if (courseId) {
+                        params.set('course_id', courseId);
+                    }
+
+                    fetch(`${suggestUrl}?${params}`, { credentials: 'same-origin' })
+                        .then(response => response.json())
+                        .then(data => {
+                            // A slower answer for an older prefix must not
+                            // replace the list for what is typed now
+                            if (seq !== suggestSeq || !data.success) {
+                                return;
+                            }
+                            suggestionList.innerHTML = '';
+                            data.suggestions.forEach(suggestion => {
+                                const option = document.createElement('option');
+                                option.value = suggestion.text;
+                                option.label = suggestion.type;
+                                suggestionList.appendChild(option);
+                            });
+                        })
+                        .catch(() => {});
+                }, 120);
+            });
+        }
     }
 
     setTimeout(function() {
@@ -163,4 +214,43 @@ function validateForm(formId) {
     });
 
     return isValid;
+}
+
+// The bundled pages are rendered on the server; these helpers are for
+// scripts that build their own views from the JSON API.
+function apiBatch(requests) {
+    return fetch('/api/batch', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        credentials: 'same-origin',
+        body: JSON.stringify({ requests: requests })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success) {
+            throw new Error(data.error);
+        }
+        const results = {};
+        data.responses.forEach(item => {
+            results[item.id] = item.body;
+        });
+        return results;
+    });
+}
+
+function fetchCatalog(filters = {}) {
+    const query = new URLSearchParams(filters).toString();
+    const suffix = query ? `?${query}` : '';
+
+    return apiBatch([
+        { id: 'courses', path: '/api/courses/' },
+        { id: 'years', path: '/api/papers/years' },
+        { id: 'subjects', path: `/api/papers/subjects${suffix}` },
+        { id: 'papers', path: `/api/papers/${suffix}` }
+    ]).then(results => ({
+        courses: results.courses.courses,
+        years: results.years.years,
+        subjects: results.subjects.subjects,
+        papers: results.papers.papers
+    }));
 }
\ No newline at end of file
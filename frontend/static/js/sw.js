@@ -0,0 +1,163 @@
+const CACHE_VERSION = 'v2';
+const SHELL_CACHE = `qp-shell-${CACHE_VERSION}`;
+const PAGE_CACHE = `qp-pages-${CACHE_VERSION}`;
+const CATALOG_CACHE = `qp-catalog-${CACHE_VERSION}`;
+const PAPER_CACHE = `qp-papers-${CACHE_VERSION}`;
+const MAX_CACHED_PAPERS = 50;
+const MAX_CACHED_PAGES = 20;
+
+const SHELL_URLS = [
+    '/',
+    '/static/css/style.css',
+    '/static/js/main.js'
+];
+
+const CATALOG_PATHS = ['/api/courses/', '/api/papers/'];
+// Typeahead answers are per keystroke and must stay live
+const UNCACHED_PATHS = ['/api/papers/suggest'];
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(SHELL_CACHE)
+            .then(cache => cache.addAll(SHELL_URLS))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    const current = [SHELL_CACHE, PAGE_CACHE, CATALOG_CACHE, PAPER_CACHE];
+    event.waitUntil(
+        caches.keys()
+            .then(names => Promise.all(
+                names.filter(name => name.startsWith('qp-') && !current.includes(name))
+                     .map(name => caches.delete(name))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+
+    const url = new URL(request.url);
+
+    if (url.origin === self.location.origin) {
+        if (url.pathname === '/auth/logout') {
+            // Papers and catalog data are only for the signed-in user
+            event.respondWith(clearUserCaches().then(() => fetch(request)));
+        } else if (url.pathname.startsWith('/download/')) {
+            event.respondWith(cachedPaper(request));
+        } else if (UNCACHED_PATHS.includes(url.pathname)) {
+            return;
+        } else if (CATALOG_PATHS.some(path => url.pathname.startsWith(path))) {
+            event.respondWith(staleWhileRevalidate(request, CATALOG_CACHE));
+        } else if (request.mode === 'navigate') {
+            event.respondWith(networkFirst(request));
+        } else if (url.pathname.startsWith('/static/')) {
+            event.respondWith(staleWhileRevalidate(request, SHELL_CACHE));
+        }
+    } else if (request.destination === 'style' || request.destination === 'script' || request.destination === 'font') {
+        event.respondWith(staleWhileRevalidate(request, SHELL_CACHE));
+    }
+});
+
+function clearUserCaches() {
+    return Promise.all([PAGE_CACHE, CATALOG_CACHE, PAPER_CACHE].map(name => caches.delete(name)));
+}
+
+// A followed redirect means the real resource was not served (usually an
+// expired session bounced to /auth/login) and must never replace it
+function isCacheable(response) {
+    return response && !response.redirected && (response.ok || response.type === 'opaque');
+}
+
+function contentType(response) {
+    return (response.headers.get('Content-Type') || '').split(';')[0].trim();
+}
+
+// Re-fetch with the cached ETag so an unchanged entry costs a 304 and no body
+function revalidate(request, cache, cached) {
+    const headers = new Headers(request.headers);
+    const etag = cached && cached.headers.get('ETag');
+    if (etag) {
+        headers.set('If-None-Match', etag);
+    }
+
+    return fetch(request.url, { headers: headers, credentials: 'same-origin', redirect: 'manual' })
+        .then(response => {
+            if (response.status === 304) {
+                return cached;
+            }
+            if (isCacheable(response) && (!cached || contentType(response) === contentType(cached))) {
+                cache.put(request, response.clone());
+            }
+            return response;
+        });
+}
+
+function staleWhileRevalidate(request, cacheName) {
+    return caches.open(cacheName).then(cache =>
+        cache.match(request).then(cached => {
+            const network = cached && request.mode !== 'no-cors'
+                ? revalidate(request, cache, cached)
+                : fetch(request).then(response => {
+                    if (isCacheable(response)) {
+                        cache.put(request, response.clone());
+                    }
+                    return response;
+                });
+
+            if (cached) {
+                network.catch(() => cached);
+                return cached;
+            }
+            return network;
+        })
+    );
+}
+
+// Pages are rendered for the signed-in user, so they live in their own
+// bounded cache that logout clears rather than in the shared app shell
+function networkFirst(request) {
+    return caches.open(PAGE_CACHE).then(cache =>
+        fetch(request)
+            .then(response => {
+                if (isCacheable(response) && response.ok) {
+                    cache.put(request, response.clone()).then(() => trimCache(cache, MAX_CACHED_PAGES));
+                }
+                return response;
+            })
+            .catch(() => cache.match(request).then(cached => cached || caches.match('/', { cacheName: SHELL_CACHE })))
+    );
+}
+
+function cachedPaper(request) {
+    return caches.open(PAPER_CACHE).then(cache =>
+        cache.match(request).then(cached => {
+            if (cached) {
+                // Re-inserting moves the entry to the end of the key order,
+                // which is what eviction treats as most recently used.
+                cache.put(request, cached.clone());
+                revalidate(request, cache, cached).catch(() => cached);
+                return cached;
+            }
+
+            return fetch(request).then(response => {
+                if (isCacheable(response) && response.ok && response.type === 'basic') {
+                    cache.put(request, response.clone()).then(() => trimCache(cache, MAX_CACHED_PAPERS));
+                }
+                return response;
+            });
+        })
+    );
+}
+
+function trimCache(cache, maxEntries) {
+    return cache.keys().then(keys => {
+        const excess = keys.slice(0, Math.max(0, keys.length - maxEntries));
+        return Promise.all(excess.map(key => cache.delete(key)));
+    });
+}
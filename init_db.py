@@ -4,6 +4,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
 from backend.app import create_app, create_admin_user, create_default_courses
 from backend.models import db
+from backend.stats import ensure_stats
 
 def init_database():
     app = create_app()
@@ -12,6 +13,7 @@ def init_database():
         db.create_all()
         create_admin_user()
         create_default_courses()
+        ensure_stats()
         print("Database initialized successfully!")
 
 if __name__ == '__main__':